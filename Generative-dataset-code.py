@@ -1,102 +1,144 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from numba import njit
 from datetime import datetime, timedelta
 
 # Setting random seed for reproducibility
-np.random.seed(42)
+rng = np.random.default_rng(42)
 
 # Date range
 start_date = datetime(2019, 1, 1)
 end_date = datetime(2024, 12, 31)
 date_range = pd.date_range(start=start_date, end=end_date)
-
-# Empty lists
-temperatures = []
-precipitations = []
-wind_speeds = []
-weather_conditions = []
+N = len(date_range)
+months = date_range.month.values
 
 # Transport modes
 modes = ["Underground", "Bus", "Overground", "Tram", "DLR", "National Rail"]
-delays = {mode: [] for mode in modes}
-cancellations = {mode: [] for mode in modes}
-riderships = {mode: [] for mode in modes}
-
-# Setting base monthly average temperatures (°C) for London
-monthly_avg_temp = {
-    1: 5, 2: 6, 3: 9, 4: 12, 5: 16, 6: 19,
-    7: 22, 8: 21, 9: 18, 10: 14, 11: 9, 12: 6
-}
 
-# Setting base monthly average precipitation (mm)
-monthly_avg_precip = {
-    1: 55, 2: 40, 3: 45, 4: 40, 5: 45, 6: 35,
-    7: 40, 8: 45, 9: 50, 10: 65, 11: 70, 12: 65
-}
+# Setting base monthly average temperatures (°C) for London (index 0 unused)
+monthly_avg_temp = np.array([0, 5, 6, 9, 12, 16, 19, 22, 21, 18, 14, 9, 6], dtype=np.float64)
+
+# Setting base monthly average precipitation (mm) (index 0 unused)
+monthly_avg_precip = np.array([0, 55, 40, 45, 40, 45, 35, 40, 45, 50, 65, 70, 65], dtype=np.int16)
+monthly_precip_chance = np.where(monthly_avg_precip > 50, 0.4, 0.2)
+
+# Windier months (November to February)
+windy_month = np.zeros(13, dtype=bool)
+windy_month[[11, 12, 1, 2]] = True
+
+# Weather conditions, indexed by the integer codes used below
+condition_names = [
+    "Thunderstorm", "Heavy Rain", "Heavy Snow", "Light Rain",
+    "Light Snow", "Frosty", "Clear", "Partly Cloudy"
+]
+
+
+# Each day's temperature depends on the previous day's, so this recurrence
+# can't be vectorised; it is compiled with Numba instead
+@njit(cache=True)
+def simulate_temps(daily_noise, base_temp, start_temp):
+    temperatures = np.empty(daily_noise.shape[0], dtype=np.float32)
+    previous_temp = start_temp
+    for i in range(daily_noise.shape[0]):
+        temp = previous_temp + daily_noise[i]
+        temp = temp * 0.7 + base_temp[i] * 0.3  # drift slowly toward the monthly average
+        temp = round(temp, 1)
+        temperatures[i] = temp
+        previous_temp = temp
+    return temperatures
+
 
 # Simulating the data
-previous_temp = 10  # the starting temperature
-
-for date in date_range:
-    # Smooth temperature fluctuation around the monthly average
-    base_temp = monthly_avg_temp[date.month]
-    temp = previous_temp + np.random.uniform(-2, 2)  # small daily fluctuation
-    temp = temp * 0.7 + base_temp * 0.3  # drift slowly toward the monthly average
-    temp = round(temp, 1)
-    previous_temp = temp
-
-    # Precipitation with some randomness
-    avg_precip = monthly_avg_precip[date.month]
-    precip_chance = 0.4 if avg_precip > 50 else 0.2  
-    precip = round(np.random.uniform(0, avg_precip)) if np.random.rand() < precip_chance else 0
-
-    # Wind speed 
-    if date.month in [11, 12, 1, 2]:
-        wind = round(np.random.uniform(15, 35))
-    else:
-        wind = round(np.random.uniform(5, 25))
-
-    # Determining the weather condition
-    if precip > 20:
-        condition = "Thunderstorm"
-    elif precip > 10:
-        condition = "Heavy Rain" if temp > 0 else "Heavy Snow"
-    elif precip > 2:
-        condition = "Light Rain" if temp > 0 else "Light Snow"
-    else:
-        if temp < 3:
-            condition = "Frosty" if np.random.rand() < 0.7 else "Clear"
-        else:
-            condition = "Clear" if np.random.rand() < 0.7 else "Partly Cloudy"
-
-    # Transport simulation 
-    for mode in modes:
-        if condition in ["Heavy Snow", "Thunderstorm"]:
-            delay = round(np.random.uniform(20, 35)) if mode != "Underground" else round(np.random.uniform(10, 20))
-            cancel = round(np.random.uniform(8, 15)) if mode != "Underground" else round(np.random.uniform(2, 5))
-            ridership = round(np.random.uniform(50, 150)) if mode != "Underground" else round(np.random.uniform(150, 200))
-        elif condition in ["Light Snow", "Heavy Rain"]:
-            delay = round(np.random.uniform(10, 20)) if mode != "Underground" else round(np.random.uniform(5, 10))
-            cancel = round(np.random.uniform(4, 8)) if mode != "Underground" else round(np.random.uniform(1, 3))
-            ridership = round(np.random.uniform(80, 130)) if mode != "Underground" else round(np.random.uniform(220, 280))
-        elif condition == "Light Rain":
-            delay = round(np.random.uniform(5, 10)) if mode != "Underground" else round(np.random.uniform(2, 5))
-            cancel = round(np.random.uniform(2, 5)) if mode != "Underground" else round(np.random.uniform(0, 2))
-            ridership = round(np.random.uniform(90, 140)) if mode != "Underground" else round(np.random.uniform(250, 300))
-        else:  # Clear, Partly Cloudy, Frosty
-            delay = round(np.random.uniform(1, 5)) if mode != "Underground" else round(np.random.uniform(1, 3))
-            cancel = round(np.random.uniform(0, 2)) if mode != "Underground" else round(np.random.uniform(0, 1))
-            ridership = round(np.random.uniform(100, 150)) if mode != "Underground" else round(np.random.uniform(280, 320))
-
-        delays[mode].append(delay)
-        cancellations[mode].append(cancel)
-        riderships[mode].append(ridership)
-
-    # Append for weather data
-    temperatures.append(temp)
-    precipitations.append(precip)
-    wind_speeds.append(wind)
-    weather_conditions.append(condition)
+previous_temp = 10.0  # the starting temperature
+
+# Smooth temperature fluctuation around the monthly average
+base_temp = monthly_avg_temp[months]
+daily_noise = rng.uniform(-2, 2, size=N)  # small daily fluctuation
+temperatures = simulate_temps(daily_noise, base_temp, previous_temp)
+
+# Precipitation with some randomness
+avg_precip = monthly_avg_precip[months]
+precip_chance = monthly_precip_chance[months]
+precip_amount = rng.integers(0, avg_precip, endpoint=True, dtype=np.int16)
+precipitations = np.where(rng.random(N) < precip_chance, precip_amount, 0)
+
+# Wind speed
+winter = windy_month[months]
+wind_speeds = rng.integers(
+    np.where(winter, 15, 5), np.where(winter, 35, 25), endpoint=True, dtype=np.int16
+)
+
+# Determining the weather condition
+dry_roll = rng.random(N) < 0.7
+condition_codes = np.select(
+    [
+        precipitations > 20,
+        (precipitations > 10) & (temperatures > 0),
+        precipitations > 10,
+        (precipitations > 2) & (temperatures > 0),
+        precipitations > 2,
+        temperatures < 3,
+    ],
+    [
+        0,
+        1,
+        2,
+        3,
+        4,
+        np.where(dry_roll, 5, 6),
+    ],
+    default=np.where(dry_roll, 6, 7),
+).astype(np.int8)
+weather_conditions = pd.Categorical.from_codes(condition_codes, categories=condition_names)
+
+# Severity band for each condition code:
+# 0 = Heavy Snow / Thunderstorm, 1 = Light Snow / Heavy Rain,
+# 2 = Light Rain, 3 = Clear / Partly Cloudy / Frosty
+severity = np.array([0, 1, 0, 2, 1, 3, 3, 3])[condition_codes]
+
+# Inclusive (low, high) ranges per severity band, as [other modes, Underground]
+delay_ranges = np.array([
+    [(20, 35), (10, 20)],
+    [(10, 20), (5, 10)],
+    [(5, 10), (2, 5)],
+    [(1, 5), (1, 3)],
+])
+cancel_ranges = np.array([
+    [(8, 15), (2, 5)],
+    [(4, 8), (1, 3)],
+    [(2, 5), (0, 2)],
+    [(0, 2), (0, 1)],
+])
+ridership_ranges = np.array([
+    [(50, 150), (150, 200)],
+    [(80, 130), (220, 280)],
+    [(90, 140), (250, 300)],
+    [(100, 150), (280, 320)],
+])
+
+
+# Row i of every transport array belongs to modes[i]
+is_underground = np.array([mode == "Underground" for mode in modes], dtype=int)
+
+
+def simulate_metric(ranges):
+    bounds = ranges[severity[np.newaxis, :], is_underground[:, np.newaxis]]
+    return rng.integers(bounds[..., 0], bounds[..., 1], endpoint=True, dtype=np.int16)
+
+
+def simulate_transport():
+    return (
+        simulate_metric(delay_ranges),
+        simulate_metric(cancel_ranges),
+        simulate_metric(ridership_ranges),
+    )
+
+
+# Transport simulation, one (modes x days) array per metric
+delays, cancellations, riderships = simulate_transport()
 
 # Creating a DataFrame
 data = {
@@ -107,14 +149,17 @@ data = {
     "Weather Condition": weather_conditions
 }
 
-for mode in modes:
-    data[f"{mode} Delays (min)"] = delays[mode]
-    data[f"{mode} Cancellations (%)"] = cancellations[mode]
-    data[f"{mode} Ridership (thousands)"] = riderships[mode]
+for i, mode in enumerate(modes):
+    data[f"{mode} Delays (min)"] = delays[i]
+    data[f"{mode} Cancellations (%)"] = cancellations[i]
+    data[f"{mode} Ridership (thousands)"] = riderships[i]
 
-df = pd.DataFrame(data)
+# Every column is already a typed array, so the frame can wrap them without copying
+df = pd.DataFrame(data, copy=False)
 
-# Saving the data into CSV
-df.to_csv("london_transport_weather_2019_2024_New.csv", index=False)
+# Saving the data into CSV (Arrow's writer formats whole columns at a time)
+table = pa.Table.from_pandas(df, preserve_index=False)
+table = table.set_column(0, "Date", table.column("Date").cast(pa.date32()))
+pacsv.write_csv(table, "london_transport_weather_2019_2024_New.csv")
 
 print("Improved dataset generated successfully!")
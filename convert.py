@@ -0,0 +1,55 @@
+import hashlib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CSV_PATH = "data/london_transport_weather_2019_2024_NEW.csv"
+PARQUET_PATH = "data/london_transport.parquet"
+
+# Parquet metadata key holding the SHA-256 of the CSV the file was built from
+SOURCE_HASH_KEY = b"source_csv_sha256"
+
+# Transport modes
+modes = ["Underground", "Bus", "Overground", "Tram", "DLR", "National Rail"]
+
+# Compact column types (delays, cancellations and ridership are small integers)
+dtypes = {
+    "Temperature (°C)": "float32",
+    "Precipitation (mm)": "int16",
+    "Wind Speed (km/h)": "int16",
+    "Weather Condition": "category",
+}
+for mode in modes:
+    dtypes[f"{mode} Delays (min)"] = "int16"
+    dtypes[f"{mode} Cancellations (%)"] = "int16"
+    dtypes[f"{mode} Ridership (thousands)"] = "int16"
+
+# Reading the dataset CSV into the frame the Streamlit app uses
+def read_dataset_csv(path=CSV_PATH):
+    df = pd.read_csv(path, dtype=dtypes, engine='pyarrow')  # Arrow's multithreaded CSV reader
+    df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y', errors='coerce', cache=True)
+    df = df.dropna(subset=['Date'])
+    df = df.sort_values('Date').reset_index(drop=True)  # the app relies on date order
+    df['Year'] = df['Date'].dt.year.astype('int16')
+    return df
+
+# SHA-256 of a file's contents
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+# SHA-256 of the CSV a Parquet file was built from (None if it wasn't recorded)
+def parquet_source_hash(path=PARQUET_PATH):
+    source_hash = (pq.read_schema(path).metadata or {}).get(SOURCE_HASH_KEY)
+    return source_hash.decode() if source_hash else None
+
+if __name__ == "__main__":
+    # Converting the dataset CSV into Parquet for the Streamlit app
+    df = read_dataset_csv()
+
+    # Saving the data into Parquet, recording which CSV it was built from
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, SOURCE_HASH_KEY: file_sha256(CSV_PATH)})
+    pq.write_table(table, PARQUET_PATH, compression='zstd')
+
+    print("Parquet dataset written successfully!")
@@ -1,25 +1,240 @@
+import io
+import os
+import logging
+import joblib
+import sklearn
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import plotly.express as px
 import plotly.graph_objects as go
+from numba import njit
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from convert import CSV_PATH, PARQUET_PATH, file_sha256, parquet_source_hash, read_dataset_csv
 
 # Setting page configuration
 st.set_page_config(layout='wide', initial_sidebar_state='expanded')
 
 # Loading the data safely
+MODEL_CACHE_DIR = "cache"
+
+logger = logging.getLogger(__name__)
+
+# Modification time of a file, or None if it doesn't exist
+def mtime_ns(path):
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+# Both files' modification times are passed to the cached functions below,
+# so editing the CSV or rebuilding the Parquet file invalidates the data and the trained models
+data_version = (mtime_ns(CSV_PATH), mtime_ns(PARQUET_PATH))
+
+# The file to read, and a hash of the data's contents for the model cache. The Parquet
+# file is built from the CSV by convert.py, which records the CSV's hash in it; the CSV
+# is read directly if the Parquet file is missing or was built from a different CSV
+@st.cache_data(show_spinner=False)
+def data_source(data_version):
+    csv_hash = file_sha256(CSV_PATH) if os.path.exists(CSV_PATH) else None
+    if os.path.exists(PARQUET_PATH):
+        parquet_hash = parquet_source_hash(PARQUET_PATH)
+        if csv_hash is None or parquet_hash == csv_hash:
+            return PARQUET_PATH, parquet_hash or file_sha256(PARQUET_PATH)
+    return CSV_PATH, csv_hash
+
+DATA_PATH, data_hash = data_source(data_version)
+if DATA_PATH == CSV_PATH and os.path.exists(PARQUET_PATH):
+    st.warning(f"{PARQUET_PATH} wasn't built from the current CSV, so the CSV is read instead. Run `python convert.py` to rebuild it.")
+
+@st.cache_data(show_spinner=False)
+def load_data(data_version):
+    if DATA_PATH == PARQUET_PATH:
+        return pd.read_parquet(DATA_PATH, engine="pyarrow")
+    return read_dataset_csv(DATA_PATH)
+
+data = load_data(data_version)
+
+# First and one-past-last row of each year; rows are sorted by date,
+# so each year is a contiguous block of rows
 @st.cache_data
-def load_data():
-    data = pd.read_csv("data/london_transport_weather_2019_2024_NEW.csv")
-    data['Date'] = pd.to_datetime(data['Date'], dayfirst=True, errors='coerce') 
-    data = data.dropna(subset=['Date'])  
-    data['Year'] = data['Date'].dt.year
-    return data
+def year_row_bounds(data_version):
+    years, starts = np.unique(data['Year'].to_numpy(), return_index=True)
+    ends = np.append(starts[1:], len(data))
+    return {int(year): (int(start), int(end)) for year, start, end in zip(years, starts, ends)}
 
-data = load_data()
+# Weather conditions that occur in the data, in category order; on a categorical,
+# value_counts(sort=False) is a count over the integer codes
+@st.cache_data
+def weather_options(data_version):
+    counts = data["Weather Condition"].value_counts(sort=False)
+    return list(counts.index[counts.to_numpy() > 0])
+
+# Column names for the selected transport modes
+@st.cache_data
+def cols_for(modes):
+    return (
+        [f"{mode} Delays (min)" for mode in modes],
+        [f"{mode} Cancellations (%)" for mode in modes],
+        [f"{mode} Ridership (thousands)" for mode in modes],
+    )
+
+# Averages runs of neighbouring heatmap columns so that at most max_columns
+# are sent to the browser; each column is labelled with its first date
+def downsample_columns(values, dates, max_columns=1200):
+    n = values.shape[1]
+    if n <= max_columns:
+        return values, dates
+    buckets = np.arange(n) * max_columns // n
+    columns_per_bucket = np.bincount(buckets)
+    binned = np.array([np.bincount(buckets, weights=row) / columns_per_bucket for row in values])
+    return binned, dates[np.searchsorted(buckets, np.arange(max_columns))]
+
+# Quantile q of an already sorted column, interpolated the way Plotly's box
+# plots do it (position q * n - 0.5, clamped to the ends of the column)
+@njit(cache=True)
+def sorted_quantile(col, q):
+    position = min(max(q * col.shape[0] - 0.5, 0.0), col.shape[0] - 1.0)
+    below = int(position)
+    above = min(below + 1, col.shape[0] - 1)
+    return col[below] + (col[above] - col[below]) * (position - below)
+
+# Quartiles, whiskers and mean of every column of a (rows x modes) array;
+# each column is sorted once and the rest is read off it in the same pass
+@njit(cache=True)
+def column_box_stats(values):
+    n, k = values.shape
+    out = np.empty((6, k))
+    if n == 0:
+        out[:] = np.nan
+        return out
+    for j in range(k):
+        col = np.sort(values[:, j])
+        q1 = sorted_quantile(col, 0.25)
+        q3 = sorted_quantile(col, 0.75)
+        low = q1 - 1.5 * (q3 - q1)
+        high = q3 + 1.5 * (q3 - q1)
+        first = 0
+        while col[first] < low:
+            first += 1
+        last = n - 1
+        while col[last] > high:
+            last -= 1
+        total = 0.0
+        for i in range(n):
+            total += col[i]
+        out[0, j] = q1
+        out[1, j] = sorted_quantile(col, 0.5)
+        out[2, j] = q3
+        out[3, j] = min(q1, col[first])  # Plotly never draws a whisker inside the box
+        out[4, j] = max(q3, col[last])
+        out[5, j] = total / n
+    return out
+
+# Box plot statistics for each column of a (rows x modes) array, computed the
+# same way as Plotly's own (its quartile interpolation, whiskers at the furthest points
+# within 1.5 IQR) so only these numbers and the distinct outliers are sent to the browser
+def box_stats(values):
+    q1, median, q3, lowerfence, upperfence, mean = column_box_stats(values)
+    outside = (values < lowerfence) | (values > upperfence)
+    return {
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "lowerfence": lowerfence,
+        "upperfence": upperfence,
+        "mean": mean,
+        "outliers": [np.unique(values[outside[:, i], i]) for i in range(values.shape[1])],
+    }
+
+# Chart builders, cached on their inputs so an unchanged selection reuses its figures;
+# they return plain figure dicts, which the cache hands back without rebuilding a Figure
+@st.cache_data
+def build_delay_bar(avg_delays):
+    return px.bar(
+        x=avg_delays.index,
+        y=avg_delays.values,
+        labels={"x": "Mode", "y": "Avg Delay (min)"},
+        color=avg_delays.values,
+        color_continuous_scale="Viridis",
+        title="Average Delays by Mode"
+    ).to_dict()
+
+@st.cache_data
+def build_delay_box(stats, modes):
+    fig = go.Figure()
+    for i, mode in enumerate(modes):
+        # With precomputed statistics, x gives the box's position and y holds one
+        # array of sample points per box (here just the outliers); an empty array
+        # would hide the whole box, so y is left out when there are no outliers
+        outliers = stats["outliers"][i]
+        fig.add_trace(go.Box(
+            name=mode,
+            x=[mode],
+            q1=[stats["q1"][i]],
+            median=[stats["median"][i]],
+            q3=[stats["q3"][i]],
+            lowerfence=[stats["lowerfence"][i]],
+            upperfence=[stats["upperfence"][i]],
+            mean=[stats["mean"][i]],
+            y=[outliers] if len(outliers) else None,
+            orientation="v",
+            boxpoints="outliers",
+        ))
+    fig.update_layout(title="Delay Distribution by Mode", yaxis_title="Delays (min)")
+    return fig.to_dict()
+
+@st.cache_data
+def build_totals_bar(modes, total_delays, total_cancellations):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=modes, y=total_delays.values, name="Total Delays"))
+    fig.add_trace(go.Bar(x=modes, y=total_cancellations.values, name="Total Cancellations"))
+    fig.update_layout(barmode='stack', title="Total Delays and Cancellations")
+    return fig.to_dict()
+
+# Plots every selected mode's delays against precipitation as one WebGL trace per mode;
+# it is keyed on the selection itself, so the rows are only looked up on a cache miss
+@st.cache_data
+def build_precip_scatter(conditions, modes, years, data_version):
+    filtered = filter_data(conditions, years)
+    delay_cols = cols_for(modes)[0]
+    precip = filtered["Precipitation (mm)"].to_numpy()
+    delays = filtered[delay_cols].to_numpy()
+    fig = go.Figure()
+    for i, col in enumerate(delay_cols):
+        fig.add_trace(go.Scattergl(x=precip, y=delays[:, i], mode="markers", name=col))
+    fig.update_layout(
+        title="Precipitation vs Delay",
+        xaxis_title="Precipitation (mm)",
+        yaxis_title="Delay",
+        legend_title="Mode"
+    )
+    return fig.to_dict()
+
+@st.cache_data
+def build_delay_heatmap(heatmap_data, heatmap_dates, delay_cols):
+    fig = go.Figure(go.Heatmap(
+        z=heatmap_data,
+        x=heatmap_dates,
+        y=delay_cols,
+        colorscale="Plasma",
+        colorbar=dict(title="Avg Delay"),
+        hovertemplate="Date: %{x}<br>Mode: %{y}<br>Avg Delay: %{z}<extra></extra>"
+    ))
+    fig.update_layout(
+        title="Daily Delay Heatmap",
+        xaxis_title="Date",
+        yaxis=dict(title="Mode", autorange="reversed")
+    )
+    return fig.to_dict()
+
+@st.cache_data
+def build_ridership_pie(ridership_total):
+    # Slices keep the order of the selected modes rather than being sorted by size
+    fig = go.Figure(go.Pie(labels=ridership_total.index, values=ridership_total.values, sort=False))
+    fig.update_layout(title="Ridership Distribution Across Modes")
+    return fig.to_dict()
 
 # Sidebar selections
 st.sidebar.title("Impact of Weather on Public Transport Dashboard")
@@ -34,7 +249,7 @@ if 'selected_years' not in st.session_state:
     st.session_state.selected_years = []
 
 # Multi-selects
-weather_conditions = data["Weather Condition"].unique()
+weather_conditions = weather_options(data_version)
 selected_conditions = st.sidebar.multiselect(
     "Select Weather Conditions", options=weather_conditions, default=st.session_state.selected_conditions
 )
@@ -44,7 +259,7 @@ selected_modes = st.sidebar.multiselect(
     "Select Transport Modes", options=transport_modes, default=st.session_state.selected_modes
 )
 
-available_years = sorted(data['Year'].unique())
+available_years = list(year_row_bounds(data_version))  # in ascending order
 selected_years = st.sidebar.multiselect(
     "Select Years", options=available_years, default=st.session_state.selected_years
 )
@@ -53,12 +268,85 @@ selected_years = st.sidebar.multiselect(
 st.session_state.selected_conditions = selected_conditions
 st.session_state.selected_modes = selected_modes
 st.session_state.selected_years = selected_years
+delay_cols, cancel_cols, rider_cols = cols_for(tuple(selected_modes))
 
 # Filtering the dataset
-filtered_data = data[
-    (data["Weather Condition"].isin(selected_conditions)) &
-    (data["Year"].isin(selected_years))
-]
+# (row positions of the selection, in date order)
+def selected_rows(conditions, years):
+    bounds = year_row_bounds(data_version)
+    year_rows = np.concatenate(
+        [np.arange(*bounds[year]) for year in sorted(years)] + [np.empty(0, dtype=np.intp)]
+    )
+    # The weather condition is categorical, so the selection becomes a lookup table
+    # indexed by category code (the extra last entry catches the -1 code of missing
+    # values); only the matching row positions are kept
+    weather = data["Weather Condition"].cat
+    selected = np.zeros(len(weather.categories) + 1, dtype=bool)
+    selected[weather.categories.get_indexer(list(conditions))] = True
+    selected[-1] = False
+    condition_mask = selected[weather.codes.to_numpy()[year_rows]]
+    return year_rows[condition_mask]
+
+# The selected rows, copied out of the frame once
+def filter_data(conditions, years):
+    return data.iloc[selected_rows(conditions, years)]
+
+# Number of rows in a selection, counted from the row positions alone,
+# so an empty one can be caught before aggregating it
+@st.cache_data
+def selected_row_count(conditions, years, data_version):
+    return len(selected_rows(conditions, years))
+
+# Aggregates behind the metrics and summary charts, cached per selection so that
+# reruns which don't change the selection (e.g. the prediction inputs) reuse them
+@st.cache_data
+def compute_aggregates(conditions, modes, years, data_version):
+    filtered = filter_data(conditions, years)
+    delay_cols, cancel_cols, rider_cols = cols_for(modes)
+
+    # The selected columns are pulled out of the frame once, as a column-major
+    # float32 array, and every aggregate below works on slices of it
+    values = np.asfortranarray(filtered[delay_cols + cancel_cols + rider_cols].to_numpy(dtype=np.float32))
+    delays, cancellations, ridership = np.split(values, 3, axis=1)
+
+    # Every column's total in a single reduction (the columns hold small integers,
+    # so their float32 sums are exact); the means are derived from the totals
+    totals = values.sum(axis=0).astype(np.int64)
+    means = np.round(totals / len(values), 1)
+    delay_totals, cancel_totals, rider_totals = np.split(totals, 3)
+    delay_means, cancel_means, rider_means = np.split(means, 3)
+
+    # Rows are in date order, so each date's rows form one contiguous run and
+    # the per-date sums are a single reduceat over the run starts
+    dates = filtered["Date"].to_numpy()
+    new_date = np.ones(len(dates), dtype=bool)
+    new_date[1:] = dates[1:] != dates[:-1]
+    date_starts = np.flatnonzero(new_date)
+    rows_per_date = np.diff(np.append(date_starts, len(dates)))
+    heatmap_data = np.add.reduceat(delays, date_starts, axis=0).T / rows_per_date
+    heatmap_data, heatmap_dates = downsample_columns(heatmap_data, dates[date_starts])
+
+    return {
+        "avg_delays": pd.Series(delay_means, index=delay_cols),
+        "avg_cancellations": pd.Series(cancel_means, index=cancel_cols),
+        "avg_ridership": pd.Series(rider_means, index=rider_cols),
+        "total_delays": pd.Series(delay_totals, index=delay_cols),
+        "total_cancellations": pd.Series(cancel_totals, index=cancel_cols),
+        "ridership_total": pd.Series(rider_totals, index=rider_cols),
+        "delay_box_stats": box_stats(delays),
+        "heatmap_data": heatmap_data,
+        "heatmap_dates": heatmap_dates,
+    }
+
+# The filtered rows as CSV bytes, written by Arrow's CSV writer
+@st.cache_data(show_spinner=False)
+def filtered_csv(conditions, years, data_version):
+    table = pa.Table.from_pandas(filter_data(conditions, years), preserve_index=False)
+    date_index = table.schema.get_field_index("Date")
+    table = table.set_column(date_index, "Date", table.column("Date").cast(pa.date32()))
+    csv = io.BytesIO()
+    pacsv.write_csv(table, csv)
+    return csv.getvalue()
 
 # Dashboard Title
 st.title("Impact of Weather on London's Public Transport")
@@ -68,16 +356,38 @@ This dashboard analyzes how different weather conditions affect delays, cancella
 """)
 
 # Main dashboard
+selection = (tuple(sorted(selected_conditions)), tuple(selected_modes), tuple(sorted(selected_years)))
 if not selected_conditions or not selected_modes or not selected_years:
     st.warning("Please select at least one weather condition, one transport mode, and one year.")
+elif selected_row_count(selection[0], selection[2], data_version) == 0:
+    st.warning("No days match the selected weather conditions and years.")
 else:
+    # Reruns that keep the same selection (e.g. changing the prediction inputs) reuse this
+    # session's aggregates and figures, rather than hashing their inputs back through the caches
+    if st.session_state.get("dashboard_key") != (selection, data_version):
+        aggregates = compute_aggregates(*selection, data_version)
+        st.session_state.aggregates = aggregates
+        st.session_state.charts = {
+            "delay_bar": build_delay_bar(aggregates["avg_delays"]),
+            "delay_box": build_delay_box(aggregates["delay_box_stats"], selected_modes),
+            "totals_bar": build_totals_bar(
+                selected_modes, aggregates["total_delays"], aggregates["total_cancellations"]
+            ),
+            "precip_scatter": build_precip_scatter(*selection, data_version),
+            "delay_heatmap": build_delay_heatmap(aggregates["heatmap_data"], aggregates["heatmap_dates"], delay_cols),
+            "ridership_pie": build_ridership_pie(aggregates["ridership_total"]),
+        }
+        st.session_state.dashboard_key = (selection, data_version)
+    aggregates = st.session_state.aggregates
+    charts = st.session_state.charts
+
     # Key Metrics Section
     st.header("Key Metrics")
     col1, col2, col3 = st.columns(3)
 
-    avg_delays = filtered_data[[f"{mode} Delays (min)" for mode in selected_modes]].mean().round(1)
-    avg_cancellations = filtered_data[[f"{mode} Cancellations (%)" for mode in selected_modes]].mean().round(1)
-    avg_ridership = filtered_data[[f"{mode} Ridership (thousands)" for mode in selected_modes]].mean().round(1)
+    avg_delays = aggregates["avg_delays"]
+    avg_cancellations = aggregates["avg_cancellations"]
+    avg_ridership = aggregates["avg_ridership"]
 
     with col1:
         st.metric("Max Avg Delay (min)", f"{avg_delays.max()} min", delta=f"{avg_delays.idxmax().split(' ')[0]}")
@@ -91,80 +401,41 @@ else:
 
     # Bar Chart: Average Delays
     st.subheader("Average Delays by Mode")
-    fig = px.bar(
-        x=avg_delays.index,
-        y=avg_delays.values,
-        labels={"x": "Mode", "y": "Avg Delay (min)"},
-        color=avg_delays.values,
-        color_continuous_scale="Viridis",
-        title="Average Delays by Mode"
-    )
-    st.plotly_chart(fig)
+    st.plotly_chart(charts["delay_bar"])
 
     # Box Plot: Delay Distribution
     st.subheader("Delay Distribution Across Modes")
-    fig = go.Figure()
-    for mode in selected_modes:
-        fig.add_trace(go.Box(y=filtered_data[f"{mode} Delays (min)"], name=mode))
-    fig.update_layout(title="Delay Distribution by Mode", yaxis_title="Delays (min)")
-    st.plotly_chart(fig)
+    st.plotly_chart(charts["delay_box"])
 
     # Stacked Bar Chart: Total Delays and Cancellations
     st.subheader("Total Delays and Cancellations")
-    total_delays = filtered_data[[f"{mode} Delays (min)" for mode in selected_modes]].sum()
-    total_cancellations = filtered_data[[f"{mode} Cancellations (%)" for mode in selected_modes]].sum()
-
-    fig = go.Figure()
-    fig.add_trace(go.Bar(x=selected_modes, y=total_delays.values, name="Total Delays"))
-    fig.add_trace(go.Bar(x=selected_modes, y=total_cancellations.values, name="Total Cancellations"))
-    fig.update_layout(barmode='stack', title="Total Delays and Cancellations")
-    st.plotly_chart(fig)
+    st.plotly_chart(charts["totals_bar"])
 
     # Scatter Plot: Precipitation vs Delays
     st.subheader("Impact of Precipitation on Delays")
-    scatter_data = filtered_data.melt(
-        id_vars=["Temperature (°C)", "Precipitation (mm)", "Wind Speed (km/h)"],
-        value_vars=[f"{mode} Delays (min)" for mode in selected_modes],
-        var_name="Mode", value_name="Delay"
-    )
-    fig = px.scatter(
-        scatter_data,
-        x="Precipitation (mm)",
-        y="Delay",
-        color="Mode",
-        title="Precipitation vs Delay"
-    )
-    st.plotly_chart(fig)
+    st.plotly_chart(charts["precip_scatter"])
 
     # Heatmap: Daily Delays
     st.subheader("Daily Delays Heatmap")
-    heatmap_data = filtered_data.groupby(["Date"])[[f"{mode} Delays (min)" for mode in selected_modes]].mean().T
-    fig = px.imshow(
-        heatmap_data,
-        labels=dict(x="Date", y="Mode", color="Avg Delay"),
-        title="Daily Delay Heatmap"
-    )
-    st.plotly_chart(fig)
+    st.plotly_chart(charts["delay_heatmap"])
 
     # Pie Chart: Ridership
     st.subheader("Ridership Distribution")
-    ridership_total = filtered_data[[f"{mode} Ridership (thousands)" for mode in selected_modes]].sum()
-    fig = px.pie(
-        names=ridership_total.index,
-        values=ridership_total.values,
-        title="Ridership Distribution Across Modes"
-    )
-    st.plotly_chart(fig)
+    st.plotly_chart(charts["ridership_pie"])
 
     # Download filtered data
+    # (the CSV is only written once it's asked for, and again only when the selection changes)
     st.subheader("Download Filtered Data")
-    csv = filtered_data.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        "Download CSV",
-        data=csv,
-        file_name="filtered_transport_weather_data.csv",
-        mime="text/csv"
-    )
+    download_key = (tuple(sorted(selected_conditions)), tuple(sorted(selected_years)))
+    if st.button("Prepare CSV Download"):
+        st.session_state.prepared_download = download_key
+    if st.session_state.get("prepared_download") == download_key:
+        st.download_button(
+            "Download CSV",
+            data=filtered_csv(*download_key, data_version),
+            file_name="filtered_transport_weather_data.csv",
+            mime="text/csv"
+        )
 
 # ========================================
 # Prediction Section " Prediction Model" 
@@ -172,24 +443,59 @@ else:
 
 st.header("Predict Delays Based on Weather Conditions")
 
-@st.cache_resource
-def train_model_and_evaluate(mode):
+# Trains one model per transport mode, all on the same train/test split
+def fit_models_and_evaluate():
     features = ["Temperature (°C)", "Precipitation (mm)", "Wind Speed (km/h)"]
     if "Snowfall (cm)" in data.columns:
         features.append("Snowfall (cm)")
-    X = data[features]
-    y = data[f"{mode} Delays (min)"]
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # The tree splitter works in float32, so the features are converted once up front
+    X = data[features].to_numpy(dtype=np.float32)
+    train_idx, test_idx = train_test_split(np.arange(len(data)), test_size=0.2, random_state=42)
+    X_train, X_test = X[train_idx], X[test_idx]
+
+    models = {}
+    for mode in transport_modes:
+        y = data[f"{mode} Delays (min)"].to_numpy()
+        y_train, y_test = y[train_idx], y[test_idx]
+
+        model = DecisionTreeRegressor(max_depth=5, random_state=42)
+        model.fit(X_train, y_train)
+
+        y_pred = model.predict(X_test)
+        r2 = r2_score(y_test, y_pred)
+        mae = mean_absolute_error(y_test, y_pred)
+        rmse = np.sqrt(mean_squared_error(y_test, y_pred))
 
-    model = DecisionTreeRegressor(max_depth=5, random_state=42)
-    model.fit(X_train, y_train)
+        models[mode] = (model, r2, mae, rmse)
 
-    y_pred = model.predict(X_test)
-    r2 = r2_score(y_test, y_pred)
-    mae = mean_absolute_error(y_test, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    return features, models
 
-    return model, features, r2, mae, rmse
+# Bumped whenever fit_models_and_evaluate's result changes shape
+MODEL_CACHE_SCHEMA = 1
+
+# Fitted models are also saved to disk, so restarting the app doesn't refit them;
+# the file name carries the hash of the data's contents, the scikit-learn version
+# and the schema, and any file that can't be loaded is refitted and rewritten
+@st.cache_resource
+def train_models_and_evaluate(data_version):
+    path = os.path.join(
+        MODEL_CACHE_DIR,
+        f"models_v{MODEL_CACHE_SCHEMA}_sklearn-{sklearn.__version__}_{data_hash[:16]}.joblib"
+    )
+    try:
+        return joblib.load(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Couldn't load cached models from %s, refitting them: %r", path, e)
+    result = fit_models_and_evaluate()
+    # Written to a temporary file first, so a crash or a second server process
+    # can never leave a half-written file at the final path
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(result, tmp_path, compress=3)
+    os.replace(tmp_path, path)
+    return result
 
 if selected_modes:
     st.subheader("Enter Weather Conditions for Prediction")
@@ -204,10 +510,13 @@ if selected_modes:
 
     if st.button("Predict Delays for Selected Modes"):
         results = []
+        features, models = train_models_and_evaluate(data_version)
+        # Converted once and shared by every selected mode's prediction
+        inputs = np.array(input_values, dtype=np.float32).reshape(1, -1)
 
         for mode in selected_modes:
-            model, features, r2, mae, rmse = train_model_and_evaluate(mode)
-            predicted_delay = model.predict([input_values])[0]
+            model, r2, mae, rmse = models[mode]
+            predicted_delay = model.predict(inputs)[0]
 
             results.append({
                 "Mode": mode,